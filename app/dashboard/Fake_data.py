@@ -3,31 +3,43 @@ import numpy as np
 
 # --- Parameters ---
 n_samples = 1000
-np.random.seed(42)  # So your lies are repeatable
+seed = 42  # So your lies are repeatable
+
+# One PCG64 generator for every draw (no legacy np.random global state)
+rng = np.random.default_rng(seed)
+
+# Per-reading (humidity, temperature, air_resistance) mean, spread and clip range
+means = np.array([50, 22, 100], dtype=np.float32)
+stds = np.array([10, 3, 30], dtype=np.float32)
+lower = np.array([20, -5, 30], dtype=np.float32)
+upper = np.array([100, 45, 300], dtype=np.float32)
 
 # --- Generate fake data ---
-timestamps = pd.date_range(start="2025-01-01", periods=n_samples, freq="5S")  # Every 5 seconds
+timestamps = pd.date_range(start="2025-01-01", periods=n_samples, freq="5s")  # Every 5 seconds
 
-humidity = np.clip(np.random.normal(50, 10, n_samples), 20, 100)
-temperature = np.clip(np.random.normal(22, 3, n_samples), -5, 45)
-air_resistance = np.clip(np.random.normal(100, 30, n_samples), 30, 300)
+# Draw all three readings as one float32 block, then scale and clip in place
+readings = rng.standard_normal((n_samples, 3), dtype=np.float32)
+readings *= stds
+readings += means
+np.clip(readings, lower, upper, out=readings)
 
 # Create "smell events" where humidity and air resistance spike
-event_detected = (np.random.rand(n_samples) > 0.9).astype(int)
-humidity += event_detected * np.random.normal(20, 5, n_samples)
-air_resistance += event_detected * np.random.normal(50, 10, n_samples)
+event_detected = (rng.random(n_samples, dtype=np.float32) > 0.9).astype(np.int8)
+events = np.flatnonzero(event_detected)
+readings[events, 0] += rng.standard_normal(events.size, dtype=np.float32) * 5 + 20
+readings[events, 2] += rng.standard_normal(events.size, dtype=np.float32) * 10 + 50
 
 # --- Create DataFrame ---
 robot_sniff_df = pd.DataFrame({
     "timestamp": timestamps,
-    "humidity": humidity,
-    "temperature": temperature,
-    "air_resistance": air_resistance,
+    "humidity": readings[:, 0],
+    "temperature": readings[:, 1],
+    "air_resistance": readings[:, 2],
     "event_detected": event_detected
 })
 
-# --- Save to CSV ---
-robot_sniff_df.to_csv("fake_robot_sniff_data.csv", index=True)
+# --- Save to Parquet (typed and columnar, so the dashboard skips CSV parsing) ---
+robot_sniff_df.to_parquet("fake_robot_sniff_data.parquet", compression="snappy", index=False)
 
-print("Fake scent detection dataset created: fake_robot_sniff_data.csv")
+print("Fake scent detection dataset created: fake_robot_sniff_data.parquet")
 print(robot_sniff_df.head())
@@ -1,6 +1,7 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
+import numpy as np
+import plotly.graph_objects as go
 import time
 
 # --- Config
@@ -12,26 +13,69 @@ st.title("🧟‍♂️ Real-Time Robot Scent Detection Dashboard")
 # --- Search Bar
 scent_search = st.text_input("Search by Scent Event (type 1 for detected, 0 for none)")
 
+# --- Sensor buffer layout (one record per streamed row)
+SENSOR_DTYPE = np.dtype([
+    ("timestamp", "datetime64[ns]"),
+    ("humidity", "f4"),
+    ("temperature", "f4"),
+    ("air_resistance", "f4"),
+    ("event_detected", "i1"),
+])
+
+# --- Number of most recent readings drawn in the live charts
+PLOT_WINDOW = 500
+
+# --- Number of most recent readings searched for the data table
+TABLE_LOOKBACK = 200
+
 # --- Load fake data
 @st.cache_data
 def load_data():
-    return pd.read_csv("fake_robot_sniff_data.csv")
+    return pd.read_parquet("fake_robot_sniff_data.parquet")
 
 data = load_data()
 
 # --- Initialize session state
-if "sensor_df" not in st.session_state:
-    st.session_state.sensor_df = pd.DataFrame(columns=["timestamp", "humidity", "temperature", "air_resistance", "event_detected"])
+# Preallocate the whole stream once and fill it in place, instead of
+# growing a DataFrame with pd.concat (which copies the full history every tick)
+if "buf" not in st.session_state:
+    st.session_state.buf = np.empty(len(data), dtype=SENSOR_DTYPE)
     st.session_state.idx = 0
 
+# --- Live figures
+# Built once per session and kept in session state; each tick only swaps
+# the trace arrays, so reruns (e.g. from the search bar) reuse them too
+if "fig1" not in st.session_state:
+    fig1 = go.Figure([
+        go.Scatter(x=[], y=[], mode="lines", name="humidity"),
+        go.Scatter(x=[], y=[], mode="lines", name="temperature"),
+    ])
+    fig1.update_layout(template="plotly_dark", xaxis_title="Time", yaxis_title="Reading", legend_title_text="variable")
+    st.session_state.fig1 = fig1
+
+    fig2 = go.Figure([
+        go.Scatter(x=[], y=[], mode="lines", name="air_resistance", line_color="cyan"),
+    ])
+    fig2.update_layout(template="plotly_dark", xaxis_title="Time", yaxis_title="Air Resistance")
+    st.session_state.fig2 = fig2
+
+fig1 = st.session_state.fig1
+fig2 = st.session_state.fig2
+
 # --- Placeholder
 placeholder = st.empty()
 
 # --- Stream data live
 while st.session_state.idx < len(data):
 
-    new_row = data.iloc[st.session_state.idx]
-    st.session_state.sensor_df = pd.concat([st.session_state.sensor_df, pd.DataFrame([new_row])])
+    idx = st.session_state.idx
+    new_row = data.iloc[idx]
+    st.session_state.buf[idx] = tuple(new_row[list(SENSOR_DTYPE.names)])
+    window = st.session_state.buf[max(0, idx + 1 - PLOT_WINDOW):idx + 1]
+
+    fig1.update_traces(x=window["timestamp"], y=window["humidity"], selector={"name": "humidity"})
+    fig1.update_traces(x=window["timestamp"], y=window["temperature"], selector={"name": "temperature"})
+    fig2.update_traces(x=window["timestamp"], y=window["air_resistance"], selector={"name": "air_resistance"})
 
     with placeholder.container():
         st.markdown("### Live Sensor KPIs")
@@ -48,41 +92,30 @@ while st.session_state.idx < len(data):
 
         with fig_col1:
             st.markdown("### Humidity & Temperature Over Time")
-            fig = px.line(
-                st.session_state.sensor_df,
-                x="timestamp",
-                y=["humidity", "temperature"],
-                labels={"value": "Reading", "timestamp": "Time"},
-                template="plotly_dark"
-            )
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(fig1, use_container_width=True)
 
         with fig_col2:
             st.markdown("### Air Resistance Over Time")
-            fig2 = px.line(
-                st.session_state.sensor_df,
-                x="timestamp",
-                y="air_resistance",
-                labels={"air_resistance": "Air Resistance", "timestamp": "Time"},
-                template="plotly_dark",
-                color_discrete_sequence=["cyan"]
-            )
             st.plotly_chart(fig2, use_container_width=True)
 
         st.markdown("### Recent Sensor Data")
 
-        # Apply filters
-        filtered_df = st.session_state.sensor_df.copy()
+        # Apply filters to a bounded tail of the buffer, not the whole history
+        start = max(0, idx + 1 - TABLE_LOOKBACK)
+        recent = st.session_state.buf[start:idx + 1]
+        positions = np.arange(start, idx + 1)
 
         if scent_search:
             try:
                 scent_search_val = int(scent_search)
-                filtered_df = filtered_df[filtered_df["event_detected"] == scent_search_val]
+                matches = recent["event_detected"] == scent_search_val
+                recent, positions = recent[matches], positions[matches]
             except ValueError:
                 st.warning("Please enter 0 or 1 for scent search.")
 
-        st.dataframe(filtered_df.tail(20), use_container_width=True)
+        st.dataframe(pd.DataFrame(recent[-20:], index=positions[-20:]), use_container_width=True)
 
+    # Keep looping inside this run rather than st.rerun(), which would
+    # re-execute the whole script and rebuild both figures every tick
     st.session_state.idx += 1
     time.sleep(1)
-    st.rerun()
\ No newline at end of file
@@ -4,34 +4,98 @@ This script loads the sensor data from CSV files and creates various plots.
 """
 
 import os
+import re
+import html
 import sys
+import argparse
+import hashlib
+import functools
 import subprocess
-import plotly
+import webbrowser
+import urllib.parse
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-import plotly.io as pio
-
-# Import plotting utilities
-from plot_utils import (
-    load_csv_data,
-    preprocess_data,
-    plot_time_series,
-    plot_multi_series,
-    create_plotly_figure,
-    plot_comparison,
-    detect_events,
-    create_dashboard
-)
-
-# Set Plotly to open plots in the browser
-pio.renderers.default = "browser"
+
+# plotly and the plotting utilities (which import plotly) are imported inside
+# the functions that use them, so importing this module for its data helpers
+# (e.g. align_time_series) does not load plotly
+
+# How the plot viewer loads plotly.js: "cdn" links it from cdn.plot.ly;
+# "directory" writes plotly.min.js once beside the plots for offline viewing
+PLOTLYJS_SOURCE = "cdn"
+
+# Single HTML page shared by every saved plot; it fetches the figure named in
+# the URL hash (plot_shell.html#<name> loads <name>.json), so each plot is
+# written as plain JSON instead of a full HTML render
+PLOT_SHELL = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<script src="{plotlyjs_src}"></script>
+<style>html, body, #plot {{ margin: 0; width: 100%; height: 100%; }}</style>
+</head>
+<body>
+<div id="plot"></div>
+<script>
+const name = decodeURIComponent(location.hash.slice(1));
+document.title = name;
+fetch(encodeURIComponent(name) + ".json")
+  .then(response => response.json())
+  .then(fig => Plotly.newPlot("plot", fig.data, fig.layout, {{responsive: true}}));
+</script>
+</body>
+</html>
+"""
+
+# Landing page listing the plots when more than one is served
+PLOT_INDEX = """<!DOCTYPE html>
+<html>
+<head><meta charset="utf-8"><title>Sensor plots</title></head>
+<body>
+<ul>
+{links}
+</ul>
+</body>
+</html>
+"""
+
+# Columns main() reads from the CSVs; the per-scent files are tagged by file
+# name instead, so their scent column is skipped
+SENSOR_COLUMNS = ["timestamp", "gas_resistance", "temperature", "humidity"]
+COMBINED_COLUMNS = SENSOR_COLUMNS + ["scent"]
+
+# Part of the preprocessing cache key; bump it whenever load_csv_data or
+# preprocess_data change their output, so cached results are recomputed
+CACHE_VERSION = 1
+
+# CSV parser used by load_csv_data: "auto" (pyarrow when installed), "pyarrow" or "pandas"
+CSV_ENGINE = "auto"
+
+def index_by_timestamp(df):
+    """
+    Index a DataFrame by its timestamp column, sorted, for label slicing.
+    
+    The timestamp column is kept; the index is left unnamed so the column
+    name stays unambiguous in groupby and sort calls.
+    
+    Args:
+        df: DataFrame with a timestamp column
+        
+    Returns:
+        DataFrame with a sorted DatetimeIndex
+    """
+    df = df.set_index(pd.DatetimeIndex(df['timestamp']).rename(None))
+    return df if df.index.is_monotonic_increasing else df.sort_index(kind='stable')
 
 def align_time_series(dfs):
     """
     Align multiple dataframes to use the same time range based on the shortest dataset.
     
+    Frames with a sorted DatetimeIndex (see index_by_timestamp) are sliced by
+    label; other frames are aligned on their timestamp column.
+    
     Args:
         dfs: Dictionary of DataFrames with sensor data
         
@@ -41,37 +105,261 @@ def align_time_series(dfs):
     if not dfs:
         return {}
     
-    # Find the shortest time range
-    min_start = None
-    max_end = None
+    # One pass over the frames: record each frame's first and last timestamp
+    # and how to slice it (sorted frames are read at the ends instead of
+    # scanning the whole column for min/max)
+    meta = []
+    for name, df in dfs.items():
+        if df.empty:
+            meta.append((name, df, None, None, None))
+        elif isinstance(df.index, pd.DatetimeIndex) and df.index.is_monotonic_increasing:
+            meta.append((name, df, df.index[0], df.index[-1], 'index'))
+        elif 'timestamp' not in df.columns:
+            meta.append((name, df, None, None, None))
+        elif df['timestamp'].is_monotonic_increasing:
+            timestamps = df['timestamp']
+            meta.append((name, df, timestamps.iloc[0], timestamps.iloc[-1], 'sorted'))
+        else:
+            timestamps = df['timestamp']
+            meta.append((name, df, timestamps.min(), timestamps.max(), 'unsorted'))
+    
+    bounds = [(start, end) for _, _, start, end, _ in meta if start is not None]
+    if not bounds:
+        return dict(dfs)
     
-    for df in dfs.values():
-        if 'timestamp' not in df.columns:
-            continue
-            
-        start = df['timestamp'].min()
-        end = df['timestamp'].max()
-        
-        if min_start is None or start > min_start:
-            min_start = start
-        
-        if max_end is None or end < max_end:
-            max_end = end
+    # Shortest common range: the latest start and the earliest end
+    # (reduced as Timestamps, so timezone-aware bounds keep their timezone)
+    min_start = max(start for start, _ in bounds)
+    max_end = min(end for _, end in bounds)
     
     # Align all dataframes to this range
     aligned_dfs = {}
-    for name, df in dfs.items():
-        if 'timestamp' not in df.columns:
+    for name, df, _, _, layout in meta:
+        if layout is None:
             aligned_dfs[name] = df
-            continue
-            
-        aligned_df = df[(df['timestamp'] >= min_start) & (df['timestamp'] <= max_end)]
-        aligned_dfs[name] = aligned_df
+        elif layout == 'index':
+            # Time-indexed: label slice, inclusive at both ends
+            aligned_dfs[name] = df.loc[min_start:max_end]
+        elif layout == 'sorted':
+            # Sorted timestamps: slice between the bounds instead of masking
+            timestamps = df['timestamp']
+            lo = timestamps.searchsorted(min_start, side='left')
+            hi = timestamps.searchsorted(max_end, side='right')
+            aligned_dfs[name] = df.iloc[lo:hi]
+        else:
+            aligned_dfs[name] = df[df['timestamp'].between(min_start, max_end)]
     
     return aligned_dfs
 
-def main():
-    """Main function to demonstrate plotting utilities."""
+def cached_preprocess(path, smooth_window, cache_dir):
+    """
+    Load and preprocess a CSV file, reusing a Parquet copy of the result.
+    
+    The cache file is keyed by the CSV's modification time and size, the
+    smoothing window, the columns read and CACHE_VERSION, so editing or
+    regenerating the CSV invalidates it. Older cache files for the same CSV
+    are removed when a new one is written.
+    
+    Args:
+        path: Path to the CSV file
+        smooth_window: Window size passed to preprocess_data
+        cache_dir: Directory holding the Parquet cache files
+        
+    Returns:
+        Preprocessed DataFrame
+    """
+    from plot_utils import load_csv_data, preprocess_data
+    
+    stat = os.stat(path)
+    key_source = (f"{os.path.abspath(path)}|{stat.st_mtime_ns}|{stat.st_size}|"
+                  f"{smooth_window}|{COMBINED_COLUMNS}|{CACHE_VERSION}")
+    key = hashlib.sha256(key_source.encode("utf-8")).hexdigest()[:16]
+    name = os.path.splitext(os.path.basename(path))[0]
+    cache_path = os.path.join(cache_dir, f"{name}-{key}.parquet")
+    
+    if os.path.exists(cache_path):
+        print(f"Using cached preprocessed data from {cache_path}")
+        return pd.read_parquet(cache_path, engine="pyarrow")
+    
+    df = load_csv_data(path, engine=CSV_ENGINE, columns=COMBINED_COLUMNS)
+    df = preprocess_data(df, smooth_window=smooth_window)
+    os.makedirs(cache_dir, exist_ok=True)
+    df.to_parquet(cache_path, engine="pyarrow", compression="zstd")
+    
+    # Drop superseded entries for this CSV (the exact key pattern, so another
+    # CSV whose name starts with "<name>-" is left alone)
+    stale_pattern = re.compile(re.escape(name) + r"-[0-9a-f]{16}\.parquet")
+    for entry in os.listdir(cache_dir):
+        if entry != os.path.basename(cache_path) and stale_pattern.fullmatch(entry):
+            os.remove(os.path.join(cache_dir, entry))
+    return df
+
+@functools.lru_cache(maxsize=16)
+def _load_and_smooth(path, window, mtime):
+    """
+    In-process memo of cached_preprocess for repeated main() calls.
+    
+    The mtime argument is only part of the cache key, so a rewritten CSV
+    misses the cache. The returned DataFrame is shared between callers and
+    must not be modified in place.
+    """
+    return cached_preprocess(path, smooth_window=window,
+                             cache_dir=os.path.join(os.path.dirname(path), ".cache"))
+
+def partition_quantile(series, q):
+    """
+    Compute a linearly interpolated quantile with a partial partition.
+    
+    Matches Series.quantile(q) (NaNs ignored), but only selects the two
+    neighbouring order statistics with np.partition instead of ordering the data.
+    
+    Args:
+        series: Series of numeric values
+        q: Quantile between 0 and 1
+        
+    Returns:
+        Quantile value (NaN for an empty or all-NaN series)
+    """
+    values = series.to_numpy(dtype=np.float64)
+    values = values[~np.isnan(values)]
+    if values.size == 0:
+        return np.nan
+    
+    position = q * (values.size - 1)
+    lo = int(position)
+    hi = min(lo + 1, values.size - 1)
+    partitioned = np.partition(values, [lo, hi])
+    return partitioned[lo] + (partitioned[hi] - partitioned[lo]) * (position - lo)
+
+def write_plot_shell(plot_dir):
+    """
+    Write the shared HTML viewer for the saved JSON plots.
+    
+    The viewer fetches the JSON, so open it through a web server
+    (e.g. ``python -m http.server`` in the plot directory) rather than file://.
+    
+    Args:
+        plot_dir: Directory for the viewer and the JSON plots
+        
+    Returns:
+        The viewer HTML
+    """
+    import plotly
+    
+    if PLOTLYJS_SOURCE == "directory":
+        plotlyjs_src = "plotly.min.js"
+        bundle_path = os.path.join(plot_dir, plotlyjs_src)
+        if not os.path.exists(bundle_path):
+            with open(bundle_path, "w", encoding="utf-8") as f:
+                f.write(plotly.offline.get_plotlyjs())
+    else:
+        plotlyjs_src = f"https://cdn.plot.ly/plotly-{plotly.offline.get_plotlyjs_version()}.min.js"
+    
+    shell = PLOT_SHELL.format(plotlyjs_src=plotlyjs_src)
+    with open(os.path.join(plot_dir, "plot_shell.html"), "w", encoding="utf-8") as f:
+        f.write(shell)
+    return shell
+
+class PlotRequestHandler(BaseHTTPRequestHandler):
+    """Serve the in-memory pages of the plot server (``server.pages``)."""
+    
+    def do_GET(self):
+        # Pages are keyed by the decoded path (plot names may need quoting)
+        page = self.server.pages.get(urllib.parse.unquote(urllib.parse.urlsplit(self.path).path))
+        if page is None:
+            self.send_error(404)
+            return
+        
+        body, content_type = page
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        # Keep the console for the script's own progress output
+        pass
+
+def serve_plots(pages, start_path="/"):
+    """
+    Serve pages from memory on a local port and open the browser once.
+    
+    Blocks until interrupted with Ctrl+C.
+    
+    Args:
+        pages: Dictionary mapping URL paths to (body bytes, content type)
+        start_path: Path (and hash) opened in the browser
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), PlotRequestHandler)
+    server.pages = pages
+    url = f"http://127.0.0.1:{server.server_port}{start_path}"
+    print(f"Serving plots at {url} (press Ctrl+C to stop)")
+    webbrowser.open(url)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+def save_and_show(plots, plot_dir):
+    """
+    Write each figure to a JSON file for the plot viewer and serve them to the browser.
+    
+    Figures are serialized with orjson when it is installed (plotly's "auto"
+    JSON engine), falling back to the standard library json module. The
+    viewer and the JSON are served from memory by one local server, so the
+    browser is opened once for all plots.
+    
+    Args:
+        plots: Dictionary of figures keyed by output file name (without extension)
+        plot_dir: Directory for the JSON files and the viewer
+    """
+    import plotly
+    import plotly.io as pio
+    
+    html_type = "text/html; charset=utf-8"
+    pages = {"/plot_shell.html": (write_plot_shell(plot_dir).encode("utf-8"), html_type)}
+    if PLOTLYJS_SOURCE == "directory":
+        pages["/plotly.min.js"] = (plotly.offline.get_plotlyjs().encode("utf-8"), "text/javascript")
+    
+    for name, fig in plots.items():
+        data = pio.to_json(fig, validate=False, engine="auto").encode("utf-8")
+        with open(os.path.join(plot_dir, f"{name}.json"), "wb") as f:
+            f.write(data)
+        pages[f"/{name}.json"] = (data, "application/json")
+    
+    links = "\n".join(
+        f'<li><a href="plot_shell.html#{urllib.parse.quote(name)}">{html.escape(name)}</a></li>'
+        for name in plots
+    )
+    pages["/"] = (PLOT_INDEX.format(links=links).encode("utf-8"), html_type)
+    
+    # A single plot opens straight in the viewer
+    serve_plots(pages, "/" if len(plots) > 1 else f"/plot_shell.html#{urllib.parse.quote(next(iter(plots)))}")
+
+def main(mode="plots"):
+    """
+    Main function to demonstrate plotting utilities.
+    
+    Args:
+        mode: "plots" to write and show each plot separately, or "dashboard"
+            to combine them into a single figure written and shown once
+    """
+    # Import plotting utilities
+    from plot_utils import (
+        load_csv_data,
+        preprocess_data,
+        plot_time_series,
+        plot_multi_series,
+        create_plotly_figure,
+        plot_comparison,
+        detect_events,
+        create_dashboard,
+        combine_figures
+    )
+    
     print("Loading sensor data...")
     
     # Define paths to CSV files
@@ -85,20 +373,19 @@ def main():
     }
     
     # Create output directory if it doesn't exist
-    os.makedirs(os.path.join(csv_dir, "plots"), exist_ok=True)
+    plot_dir = os.path.join(csv_dir, "plots")
+    os.makedirs(plot_dir, exist_ok=True)
     
     # Load the combined dataset
     if os.path.exists(combined_csv):
-        print(f"Loading combined data from {combined_csv}")
-        combined_df = load_csv_data(combined_csv)
-        print(f"Loaded {len(combined_df)} records")
+        # Load and preprocess, or reuse the cached result from a previous run
+        print(f"Loading and preprocessing combined data from {combined_csv}")
+        smoothed_df = _load_and_smooth(combined_csv, 5, os.path.getmtime(combined_csv))
+        print(f"Loaded {len(smoothed_df)} records")
         
-        # Basic preprocessing
-        print("Preprocessing data...")
-        smoothed_df = preprocess_data(combined_df, smooth_window=5)
-        
-        # Create and show various plots
+        # Create various plots, collected by output file name
         print("Creating plots...")
+        plots = {}
         
         # 1. Basic time series plot of gas resistance by scent
         print("1. Creating time series plot of gas resistance...")
@@ -109,8 +396,7 @@ def main():
             color_by="scent",
             log_scale=True
         )
-        fig1.write_html(os.path.join(csv_dir, "plots", "gas_resistance_time_series.html"))
-        fig1.show()
+        plots["gas_resistance_time_series"] = fig1
         
         # 2. Multi-panel plot with all sensor readings
         # print("2. Creating multi-panel plot with all sensor readings...")
@@ -120,8 +406,7 @@ def main():
         #     title="Sensor Readings Over Time",
         #     color_by="scent"
         # )
-        # fig2.write_html(os.path.join(csv_dir, "plots", "multi_panel_plot.html"))
-        # fig2.show()
+        # plots["multi_panel_plot"] = fig2
         
         # 3. Scatter plot of gas resistance vs. humidity colored by scent
         print("3. Creating scatter plot of gas resistance vs. humidity...")
@@ -134,10 +419,10 @@ def main():
             title="Gas Resistance vs. Humidity",
             log_y=True,
             opacity=0.7,
-            size_max=10
+            size_max=10,
+            render_mode="webgl"  # Draw points with WebGL (scattergl) rather than SVG
         )
-        fig3.write_html(os.path.join(csv_dir, "plots", "gas_vs_humidity_scatter.html"))
-        fig3.show()
+        plots["gas_vs_humidity_scatter"] = fig3
         
         # 4. Box plot of gas resistance by scent
         print("4. Creating box plot of gas resistance by scent...")
@@ -149,13 +434,12 @@ def main():
             title="Distribution of Gas Resistance by Scent",
             log_y=True
         )
-        fig4.write_html(os.path.join(csv_dir, "plots", "gas_resistance_boxplot.html"))
-        fig4.show()
+        plots["gas_resistance_boxplot"] = fig4
         
         # 5. Event detection - high gas resistance events
         print("5. Detecting high gas resistance events...")
         # Calculate a threshold based on percentile
-        threshold = smoothed_df["gas_resistance"].quantile(0.75)
+        threshold = partition_quantile(smoothed_df["gas_resistance"], 0.75)
         events_df = detect_events(
             smoothed_df,
             column="gas_resistance",
@@ -172,35 +456,64 @@ def main():
             y="gas_resistance",
             color="event",
             title=f"Gas Resistance Events (Threshold: {threshold:.2f})",
-            log_y=True
+            log_y=True,
+            render_mode="webgl"
         )
-        fig5.write_html(os.path.join(csv_dir, "plots", "gas_resistance_events.html"))
-        fig5.show()
+        plots["gas_resistance_events"] = fig5
         
-        # 6. Create a comprehensive dashboard
-        print("6. Creating comprehensive dashboard...")
-        fig6 = create_dashboard(smoothed_df)
-        fig6.write_html(os.path.join(csv_dir, "plots", "sensor_dashboard.html"))
-        fig6.show()
+        if mode == "dashboard":
+            # 6. Put every panel in one grid: a single JSON write and browser tab
+            print("6. Combining plots into a single dashboard...")
+            fig_temperature = plot_time_series(
+                smoothed_df,
+                y_column="temperature",
+                title="Temperature Over Time by Scent",
+                color_by="scent"
+            )
+            fig_humidity = plot_time_series(
+                smoothed_df,
+                y_column="humidity",
+                title="Humidity Over Time by Scent",
+                color_by="scent"
+            )
+            plots = {"sensor_overview": combine_figures(
+                list(plots.values()) + [fig_temperature, fig_humidity],
+                cols=2,
+                title="Sensor Data Overview"
+            )}
+        else:
+            # 6. Create a comprehensive dashboard
+            print("6. Creating comprehensive dashboard...")
+            fig6 = create_dashboard(smoothed_df)
+            plots["sensor_dashboard"] = fig6
+        
+        save_and_show(plots, plot_dir)
         
     else:
         print(f"Combined CSV file not found: {combined_csv}")
         
-        # Load individual datasets if available
-        dfs = {}
-        for name, path in individual_csvs.items():
-            if os.path.exists(path):
-                print(f"Loading {name} data from {path}")
-                dfs[name] = load_csv_data(path)
+        # Load individual datasets if available, parsing the files concurrently
+        available_csvs = {name: path for name, path in individual_csvs.items() if os.path.exists(path)}
+        for name, path in available_csvs.items():
+            print(f"Loading {name} data from {path}")
+        
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            loaded = executor.map(
+                lambda path: load_csv_data(path, engine=CSV_ENGINE, columns=SENSOR_COLUMNS),
+                available_csvs.values()
+            )
+            dfs = {name: index_by_timestamp(df) for name, df in zip(available_csvs, loaded)}
         
         if dfs:
             # Align time series to use the shortest data length
             print("Aligning time series data...")
             aligned_dfs = align_time_series(dfs)
             
-            # Preprocess each dataset
-            processed_dfs = {name: preprocess_data(df, smooth_window=5) 
-                           for name, df in aligned_dfs.items()}
+            # Preprocess all datasets in one pass over a single scent-tagged frame;
+            # concatenating the dict tags each frame by its key
+            tagged_df = pd.concat(aligned_dfs, names=["scent"], copy=False).reset_index(level=0)
+            smoothed_df = preprocess_data(tagged_df, smooth_window=5, group_by="scent")
+            processed_dfs = {name: group for name, group in smoothed_df.groupby("scent", sort=False)}
             
             # Create comparison plot
             print("Creating comparison plot of gas resistance...")
@@ -210,10 +523,16 @@ def main():
                 title="Comparison of Gas Resistance Across Scents",
                 log_scale=True
             )
-            fig.write_html(os.path.join(csv_dir, "plots", "scent_comparison.html"))
-            fig.show()
+            save_and_show({"scent_comparison": fig}, plot_dir)
         else:
             print("No data files found.")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Plot the sensor data in csv_output.")
+    parser.add_argument(
+        "--mode",
+        choices=["plots", "dashboard"],
+        default="plots",
+        help="write and show each plot separately (default), or one combined dashboard"
+    )
+    main(mode=parser.parse_args().mode)
@@ -1,76 +1,61 @@
 import os
 import re
-import csv
 import datetime
+import numpy as np
+import pandas as pd
+
+READING_COLUMNS = ['gas_resistance', 'temperature', 'humidity']
+CSV_COLUMNS = ['timestamp', 'scent'] + READING_COLUMNS
+
+# One reading is a "Gas Resistance", "Temperature", "Humidity" line triple
+READING_PATTERN = re.compile(
+    r'Gas Resistance:\s*([\d\.]+)[^\n]*\n\s*'
+    r'Temperature:\s*([\d\.]+)[^\n]*\n\s*'
+    r'Humidity:\s*([\d\.]+)'
+)
 
 def parse_sensor_data(file_path):
-    """Parse sensor data from text file into structured format."""
+    """Parse sensor data from text file into a DataFrame of readings."""
     try:
         # Read file with proper encoding
         with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
-            lines = f.readlines()
+            text = f.read()
         
-        readings = []
-        i = 0
-        
-        # Process in groups of 3 lines
-        while i < len(lines) - 2:
-            # Extract values using regex with more flexible pattern matching
-            gas_line = lines[i].strip()
-            temp_line = lines[i+1].strip()
-            humidity_line = lines[i+2].strip()
-            
-            # Use more robust regex patterns
-            gas_match = re.search(r'Gas Resistance:\s*([\d\.]+)', gas_line)
-            temp_match = re.search(r'Temperature:\s*([\d\.]+)', temp_line)
-            humidity_match = re.search(r'Humidity:\s*([\d\.]+)', humidity_line)
-            
-            if gas_match and temp_match and humidity_match:
+        # Match every gas/temperature/humidity line triple in a single pass
+        values = [match.groups() for match in READING_PATTERN.finditer(text)]
+        try:
+            numbers = np.asarray(values, dtype=float).reshape(-1, 3)
+        except ValueError:
+            # A malformed number (e.g. a bare "."): convert reading by reading
+            # and skip only the readings that fail
+            numbers = []
+            for groups in values:
                 try:
-                    gas = float(gas_match.group(1))
-                    temp = float(temp_match.group(1))
-                    humidity = float(humidity_match.group(1))
-                    
-                    readings.append({
-                        'gas_resistance': gas,
-                        'temperature': temp,
-                        'humidity': humidity
-                    })
+                    numbers.append([float(value) for value in groups])
                 except ValueError as ve:
                     print(f"Error converting values: {ve}")
-            else:
-                print(f"Failed to match pattern at line {i}")
-            
-            i += 3  # Move to next group
+            numbers = np.asarray(numbers, dtype=float).reshape(-1, 3)
+        
+        readings = pd.DataFrame(numbers, columns=READING_COLUMNS)
         
         print(f"Found {len(readings)} readings in {file_path}")
         return readings
     except Exception as e:
         print(f"Error processing {file_path}: {str(e)}")
-        return []
+        return pd.DataFrame(columns=READING_COLUMNS)
 
-def save_to_csv(readings, output_file, scent_name):
-    """Save readings to CSV file with timestamp and scent name."""
-    # Create CSV file with headers
-    with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
-        fieldnames = ['timestamp', 'scent', 'gas_resistance', 'temperature', 'humidity']
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        
-        # Add timestamp for each reading
-        timestamp = datetime.datetime.now()
-        time_increment = datetime.timedelta(seconds=5)  # Assume 5 seconds between readings
-        
-        for reading in readings:
-            row = {
-                'timestamp': timestamp.strftime('%Y-%m-%d %H:%M:%S'),
-                'scent': scent_name,
-                'gas_resistance': reading['gas_resistance'],
-                'temperature': reading['temperature'],
-                'humidity': reading['humidity']
-            }
-            writer.writerow(row)
-            timestamp += time_increment
+def save_to_csv(readings, output_file, scent_name=None):
+    """Save readings to CSV file with timestamp and scent name.
+
+    If scent_name is None, the readings' own 'scent' column is kept.
+    """
+    # Assume 5 seconds between readings
+    timestamps = pd.date_range(start=datetime.datetime.now(), periods=len(readings), freq='5s')
+    df = readings.assign(timestamp=timestamps)
+    if scent_name is not None:
+        df = df.assign(scent=scent_name)
+    
+    df[CSV_COLUMNS].to_csv(output_file, index=False, encoding='utf-8', date_format='%Y-%m-%d %H:%M:%S')
 
 def main():
     # Define input and output files
@@ -95,41 +80,22 @@ def main():
         print(f"\nProcessing {scent} data from {file_path}...")
         readings = parse_sensor_data(file_path)
         
-        if readings:
+        if not readings.empty:
             # Save to individual CSV
             output_file = os.path.join(output_dir, f'{scent}.csv')
             save_to_csv(readings, output_file, scent)
             print(f"Saved {len(readings)} readings to {output_file}")
             
             # Add to combined data with scent label
-            for reading in readings:
-                reading['scent'] = scent
-            all_readings.extend(readings)
+            all_readings.append(readings.assign(scent=scent))
         else:
             print(f"No valid readings found in {file_path}")
     
     # Save combined data
     if all_readings:
+        all_readings = pd.concat(all_readings, ignore_index=True)
         combined_output = os.path.join(output_dir, 'combined_scents.csv')
-        with open(combined_output, 'w', newline='', encoding='utf-8') as csvfile:
-            fieldnames = ['timestamp', 'scent', 'gas_resistance', 'temperature', 'humidity']
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-            
-            # Add timestamp for each reading
-            timestamp = datetime.datetime.now()
-            time_increment = datetime.timedelta(seconds=5)  # Assume 5 seconds between readings
-            
-            for reading in all_readings:
-                row = {
-                    'timestamp': timestamp.strftime('%Y-%m-%d %H:%M:%S'),
-                    'scent': reading['scent'],
-                    'gas_resistance': reading['gas_resistance'],
-                    'temperature': reading['temperature'],
-                    'humidity': reading['humidity']
-                }
-                writer.writerow(row)
-                timestamp += time_increment
+        save_to_csv(all_readings, combined_output)
         
         print(f"\nSaved combined data with {len(all_readings)} readings to {combined_output}")
     else:
@@ -11,30 +11,145 @@ import plotly.express as px
 from plotly.subplots import make_subplots
 from typing import List, Dict, Union, Optional, Tuple
 
+# Copy-on-Write lets assign() and column selections share untouched column
+# data with their source frame instead of copying it (always on in pandas 3)
+if pd.__version__.startswith('2.'):
+    pd.set_option('mode.copy_on_write', True)
 
-def load_csv_data(file_path: str) -> pd.DataFrame:
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# Column types for sensor CSVs; sensor precision is well within float32
+CSV_DTYPES = {
+    'gas_resistance': 'float32',
+    'temperature': 'float32',
+    'humidity': 'float32',
+    'scent': 'category',
+}
+
+if PYARROW_AVAILABLE:
+    # The same schema for pyarrow's CSV reader
+    ARROW_COLUMN_TYPES = {
+        'timestamp': pa.timestamp('ns'),
+        'gas_resistance': pa.float32(),
+        'temperature': pa.float32(),
+        'humidity': pa.float32(),
+        'scent': pa.dictionary(pa.int32(), pa.string()),
+    }
+
+# Bytes per block handed to each pyarrow CSV parsing thread
+ARROW_CSV_BLOCK_SIZE = 8 << 20
+
+
+def load_csv_data(file_path: str,
+                  engine: str = 'auto',
+                  columns: Optional[List[str]] = None) -> pd.DataFrame:
     """
     Load sensor data from a CSV file.
 
     The CSV file is expected to have columns for timestamp, gas resistance,
-    temperature, and humidity. The timestamp column is converted to datetime
-    format.
+    temperature, and humidity. Types are declared up front (see CSV_DTYPES)
+    and the timestamp column is parsed as datetime while reading.
 
     Args:
         file_path: Path to the CSV file
+        engine: CSV parser to use: 'pyarrow' (multi-threaded), 'pandas'
+            (C parser), or 'auto' to use pyarrow when it is installed and can
+            parse the file, falling back to pandas otherwise
+        columns: Optional list of columns to read; the others are skipped
+            while parsing. Every listed column must exist in the file
 
     Returns:
         DataFrame with the sensor data
     """
-    df = pd.read_csv(file_path)
-    if 'timestamp' in df.columns:
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-    return df
+    if engine not in ('auto', 'pyarrow', 'pandas'):
+        raise ValueError(f"Unsupported CSV engine: {engine}")
+    
+    if engine == 'pyarrow' and not PYARROW_AVAILABLE:
+        raise ImportError("engine='pyarrow' requires the pyarrow package")
+    
+    if engine == 'pyarrow' or (engine == 'auto' and PYARROW_AVAILABLE):
+        try:
+            table = pacsv.read_csv(
+                file_path,
+                read_options=pacsv.ReadOptions(block_size=ARROW_CSV_BLOCK_SIZE, use_threads=True),
+                convert_options=pacsv.ConvertOptions(
+                    column_types=ARROW_COLUMN_TYPES,
+                    include_columns=columns
+                )
+            )
+            return table.to_pandas(self_destruct=True)
+        except pa.ArrowInvalid:
+            if engine == 'pyarrow':
+                raise
+    
+    # Only ask for date parsing when the file actually has a timestamp column
+    header = pd.read_csv(file_path, nrows=0).columns if columns is None else columns
+    parse_dates = ['timestamp'] if 'timestamp' in header else False
+    df = pd.read_csv(file_path, usecols=columns, dtype=CSV_DTYPES, parse_dates=parse_dates, engine='c')
+    
+    # usecols keeps the file's column order; match the requested order as pyarrow does
+    return df if columns is None else df[list(columns)]
+
+
+def _centered_rolling_mean(values: np.ndarray,
+                           window: int,
+                           run_ids: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Centered rolling mean along the first axis using cumulative sums.
+    
+    Equivalent to ``rolling(window, center=True).mean()`` with incomplete
+    windows (at the edges) and windows containing NaN filled by the raw values,
+    but costs O(N) regardless of the window size.
+    
+    Args:
+        values: 2D float array with one column per sensor reading
+        window: Window size
+        run_ids: Optional non-decreasing id per row; windows spanning two runs
+            count as incomplete, so each run is smoothed independently
+        
+    Returns:
+        Smoothed float64 array with the same shape as values
+    """
+    result = values.astype(np.float64)
+    n_windows = len(values) - window + 1
+    if n_windows < 1:
+        return result
+    
+    # Running totals with a leading zero row; NaNs are counted instead of summed
+    nan_mask = np.isnan(result)
+    sums = np.zeros((len(values) + 1, values.shape[1]))
+    np.cumsum(np.where(nan_mask, 0.0, result), axis=0, out=sums[1:])
+    nan_counts = np.zeros(sums.shape, dtype=np.int64)
+    np.cumsum(nan_mask, axis=0, out=nan_counts[1:])
+    
+    window_means = (sums[window:] - sums[:-window]) / window
+    window_valid = (nan_counts[window:] - nan_counts[:-window]) == 0
+    if run_ids is not None:
+        window_valid &= (run_ids[:n_windows] == run_ids[window - 1:])[:, np.newaxis]
+    
+    # Each full window is labelled at its centre point, as pandas does
+    offset = window // 2
+    centred = result[offset:offset + n_windows]
+    np.copyto(centred, window_means, where=window_valid)
+    
+    return result
 
 
 def preprocess_data(df: pd.DataFrame, 
                    smooth_window: Optional[int] = None,
-                   normalize: bool = False) -> pd.DataFrame:
+                   normalize: bool = False,
+                   group_by: Optional[str] = None) -> pd.DataFrame:
     """
     Preprocess sensor data with optional smoothing and normalization.
     
@@ -42,31 +157,56 @@ def preprocess_data(df: pd.DataFrame,
         df: DataFrame with sensor data
         smooth_window: Window size for rolling average smoothing (None for no smoothing)
         normalize: Whether to normalize numerical columns to 0-1 range
+        group_by: Column (e.g., 'scent') whose groups are smoothed and normalized
+            independently; each group's rows must be contiguous
         
     Returns:
         Preprocessed DataFrame
     """
-    # Make a copy to avoid modifying the original
-    processed_df = df.copy()
-    
-    # Apply smoothing if specified
-    if smooth_window is not None and smooth_window > 1:
-        numeric_cols = ['gas_resistance', 'temperature', 'humidity']
-        for col in numeric_cols:
-            if col in processed_df.columns:
-                processed_df[f'{col}_raw'] = processed_df[col]
-                processed_df[col] = processed_df[col].rolling(window=smooth_window, center=True).mean()
-                processed_df[col] = processed_df[col].fillna(processed_df[f'{col}_raw'])
-    
-    # Apply normalization if specified
-    if normalize:
-        numeric_cols = ['gas_resistance', 'temperature', 'humidity']
-        for col in numeric_cols:
-            if col in processed_df.columns:
-                min_val = processed_df[col].min()
-                max_val = processed_df[col].max()
-                if max_val > min_val:  # Avoid division by zero
-                    processed_df[f'{col}_normalized'] = (processed_df[col] - min_val) / (max_val - min_val)
+    # Columns are only added or replaced through assign(), which returns a new
+    # frame, so the original is never modified and needs no upfront copy
+    processed_df = df
+    
+    numeric_cols = [col for col in ['gas_resistance', 'temperature', 'humidity']
+                    if col in processed_df.columns]
+    
+    # Contiguous runs of the grouping column, numbered from 1
+    run_ids = None
+    if group_by is not None:
+        groups = processed_df[group_by]
+        run_ids = (groups != groups.shift()).cumsum().to_numpy()
+    
+    # Apply smoothing if specified, to all numeric columns (and groups) in one pass
+    if smooth_window is not None and smooth_window > 1 and numeric_cols:
+        raw = processed_df[numeric_cols]
+        smoothed = _centered_rolling_mean(raw.to_numpy(dtype=np.float64), smooth_window, run_ids)
+        # Sums are accumulated in float64, but float columns (float32 from
+        # load_csv_data) keep their own width to halve downstream traffic
+        smoothed_cols = {
+            col: smoothed[:, i].astype(raw[col].dtype) if raw[col].dtype.kind == 'f' else smoothed[:, i]
+            for i, col in enumerate(numeric_cols)
+        }
+        processed_df = processed_df.assign(
+            **smoothed_cols,
+            **{f'{col}_raw': raw[col] for col in numeric_cols}
+        )
+    
+    # Apply normalization if specified, using column-wise (per group) min/max
+    if normalize and numeric_cols:
+        values = processed_df[numeric_cols]
+        if run_ids is None:
+            min_vals = values.min()
+            max_vals = values.max()
+        else:
+            min_vals = values.groupby(run_ids).transform('min')
+            max_vals = values.groupby(run_ids).transform('max')
+        value_range = max_vals - min_vals
+        normalized = (values - min_vals) / value_range.where(value_range > 0)
+        processed_df = processed_df.assign(**{
+            f'{col}_normalized': normalized[col]
+            for col in numeric_cols
+            if np.any(value_range[col] > 0)  # Avoid division by zero
+        })
     
     return processed_df
 
@@ -84,9 +224,9 @@ def align_dataframes(dfs: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
     if not dfs:
         return {}
     
-    # Find the shortest time range
-    min_start = None
-    max_end = None
+    # Find the overlapping time range: the latest start and the earliest end
+    latest_start = None
+    earliest_end = None
     
     for df in dfs.values():
         if 'timestamp' not in df.columns:
@@ -95,11 +235,11 @@ def align_dataframes(dfs: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
         start = df['timestamp'].min()
         end = df['timestamp'].max()
         
-        if min_start is None or start > min_start:
-            min_start = start
+        if latest_start is None or start > latest_start:
+            latest_start = start
         
-        if max_end is None or end < max_end:
-            max_end = end
+        if earliest_end is None or end < earliest_end:
+            earliest_end = end
     
     # Align all dataframes to this range
     aligned_dfs = {}
@@ -107,8 +247,15 @@ def align_dataframes(dfs: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
         if 'timestamp' not in df.columns:
             aligned_dfs[name] = df
             continue
-            
-        aligned_df = df[(df['timestamp'] >= min_start) & (df['timestamp'] <= max_end)]
+        
+        timestamps = df['timestamp']
+        if timestamps.is_monotonic_increasing:
+            # Sorted timestamps: slice between the bounds instead of masking
+            lo = timestamps.searchsorted(latest_start, side='left')
+            hi = timestamps.searchsorted(earliest_end, side='right')
+            aligned_df = df.iloc[lo:hi]
+        else:
+            aligned_df = df[(timestamps >= latest_start) & (timestamps <= earliest_end)]
         aligned_dfs[name] = aligned_df
     
     return aligned_dfs
@@ -315,6 +462,41 @@ def plot_comparison(dfs: Dict[str, pd.DataFrame],
     return fig
 
 
+def _detect_events_kernel(values: np.ndarray,
+                          threshold: float,
+                          window: int,
+                          above: bool) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Single-pass event detection over a float array.
+    
+    A point is an event when it and the preceding window - 1 points all cross
+    the threshold. Event groups are numbered from 1 and increase each time the
+    event state changes, matching the pandas implementation in detect_events.
+    
+    Returns:
+        Tuple of (event mask, event group) arrays
+    """
+    n = values.size
+    mask = np.empty(n, np.bool_)
+    event_group = np.empty(n, np.int64)
+    run = 0
+    group = 0
+    
+    for i in range(n):
+        crossed = values[i] > threshold if above else values[i] < threshold
+        run = run + 1 if crossed else 0
+        mask[i] = run >= window
+        if i == 0 or mask[i] != mask[i - 1]:
+            group += 1
+        event_group[i] = group
+    
+    return mask, event_group
+
+
+if NUMBA_AVAILABLE:
+    _detect_events_kernel = njit(cache=True)(_detect_events_kernel)
+
+
 def detect_events(df: pd.DataFrame, 
                  column: str, 
                  threshold: float,
@@ -333,29 +515,43 @@ def detect_events(df: pd.DataFrame,
     Returns:
         DataFrame with events marked
     """
-    result_df = df.copy()
+    if direction not in ('above', 'below'):
+        raise ValueError("direction must be 'above' or 'below'")
+    
+    if NUMBA_AVAILABLE:
+        # Fused mask, window and grouping pass compiled with numba
+        mask, event_group = _detect_events_kernel(
+            df[column].to_numpy(dtype=np.float64),
+            float(threshold),
+            max(window, 1),
+            direction == 'above'
+        )
+        return df.assign(
+            event=mask,
+            event_group=event_group,
+            event_id=np.where(mask, event_group, 0)
+        )
     
     # Create a boolean mask for threshold crossing
     if direction == 'above':
-        mask = result_df[column] > threshold
-    elif direction == 'below':
-        mask = result_df[column] < threshold
+        mask = df[column] > threshold
     else:
-        raise ValueError("direction must be 'above' or 'below'")
+        mask = df[column] < threshold
     
     # Apply rolling window to ensure consecutive points
     if window > 1:
         mask = mask.rolling(window=window).sum() >= window
         mask = mask.fillna(False)
     
-    # Mark events in the DataFrame
-    result_df['event'] = mask
-    
     # Create event groups
-    result_df['event_group'] = (result_df['event'] != result_df['event'].shift()).cumsum()
-    result_df['event_id'] = result_df['event_group'] * result_df['event']
+    event_group = (mask != mask.shift()).cumsum()
     
-    return result_df
+    # Mark events in a new DataFrame, leaving the original untouched
+    return df.assign(
+        event=mask,
+        event_group=event_group,
+        event_id=event_group * mask
+    )
 
 
 def create_dashboard(df: pd.DataFrame, 
@@ -454,3 +650,53 @@ def create_dashboard(df: pd.DataFrame,
     fig.update_xaxes(title_text="Time", row=len(columns), col=1)
     
     return fig
+
+
+def combine_figures(figures: List[go.Figure], 
+                    cols: int = 2,
+                    title: str = "Sensor Data Overview") -> go.Figure:
+    """
+    Combine single-panel figures into one subplot grid.
+    
+    Each figure's traces, axis titles and log-scale y-axis are carried over to
+    its own panel, and its title becomes the panel title. Legend entries are
+    shown once per legend group across all panels.
+    
+    Args:
+        figures: Figures to combine, placed row by row
+        cols: Number of grid columns
+        title: Title of the combined figure
+        
+    Returns:
+        Plotly figure object
+    """
+    rows = -(-len(figures) // cols)  # Ceiling division
+    fig = make_subplots(
+        rows=rows,
+        cols=cols,
+        vertical_spacing=0.08,
+        subplot_titles=[source.layout.title.text or "" for source in figures]
+    )
+    
+    shown_groups = set()
+    for i, source in enumerate(figures):
+        row, col = i // cols + 1, i % cols + 1
+        
+        for trace in source.data:
+            group = trace.legendgroup or trace.name
+            fig.add_trace(trace, row=row, col=col)
+            fig.data[-1].showlegend = group not in shown_groups
+            shown_groups.add(group)
+        
+        fig.update_xaxes(title_text=source.layout.xaxis.title.text, row=row, col=col)
+        fig.update_yaxes(title_text=source.layout.yaxis.title.text, row=row, col=col)
+        if source.layout.yaxis.type == "log":
+            fig.update_yaxes(type="log", row=row, col=col)
+    
+    fig.update_layout(
+        height=400 * rows,
+        title_text=title,
+        template="plotly_white"
+    )
+    
+    return fig
@@ -1,20 +1,39 @@
 from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.metrics.pairwise import euclidean_distances
 
 import faiss
+import functools
+import hashlib
+import json
 import numpy as np
+import os
+
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache')
+
+
+@functools.lru_cache(maxsize=1)
+def _load_model(model_name):
+    """Load a sentence transformer model once per process."""
+    return SentenceTransformer(model_name)
 
 
 class ScentSearch:
-    def __init__(self, model_name='all-MiniLM-L6-v2'):
+    # Corpora at least this large get an IVF-PQ index instead of a full scan
+    IVFPQ_MIN_SCENTS = 10000
+    # Number of IVF lists probed per query when the IVF-PQ index is used
+    IVFPQ_NPROBE = 16
+
+    def __init__(self, model_name='all-MiniLM-L6-v2', cache_dir=DEFAULT_CACHE_DIR):
         """
         Initialize the scent search system with a sentence transformer model.
         
         Args:
             model_name (str): Name of the sentence transformer model to use
+            cache_dir (str): Directory for cached indexes and vectors (None to disable)
         """
-        self.model = SentenceTransformer(model_name)
+        self.model_name = model_name
+        self.model = _load_model(model_name)
+        self.cache_dir = cache_dir
         self.scent_descriptions = []
         self.scent_vectors = None
         self.index = None
@@ -28,16 +47,76 @@ class ScentSearch:
             scent_descriptions (list): List of scent description strings
         """
         self.scent_descriptions = scent_descriptions
-        self.scent_vectors = self.model.encode(scent_descriptions)
         
-        # Create and populate FAISS index
-        dimension = self.scent_vectors.shape[1]
-        self.index = faiss.IndexFlatL2(dimension)
+        # Reuse a previously built index for the same model and descriptions
+        index_path, vectors_path = self._cache_paths(scent_descriptions)
+        if index_path and os.path.exists(index_path) and os.path.exists(vectors_path):
+            self.index = faiss.read_index(index_path)
+            if isinstance(self.index, faiss.IndexIVF):
+                self.index.nprobe = self.IVFPQ_NPROBE
+            self.scent_vectors = np.load(vectors_path)
+            print(f"Loaded {len(scent_descriptions)} scents from cache: {index_path}")
+            return
+        
+        self.scent_vectors = self.model.encode(scent_descriptions, convert_to_numpy=True)
+        
+        # Normalize so inner product equals cosine similarity
+        faiss.normalize_L2(self.scent_vectors)
+        
+        # Create, train and populate the quantized FAISS index
+        self.index = self._build_index(self.scent_vectors.shape[1], len(scent_descriptions))
+        self.index.train(self.scent_vectors)
         self.index.add(self.scent_vectors)
         
+        if index_path:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            faiss.write_index(self.index, index_path)
+            np.save(vectors_path, self.scent_vectors)
+        
         print(f"Added {len(scent_descriptions)} scents to index")
         print(f"Vector shape: {self.scent_vectors.shape}")
     
+    def _cache_paths(self, scent_descriptions):
+        """
+        Get the cache file paths for an index over the given descriptions.
+        
+        Args:
+            scent_descriptions (list): List of scent description strings
+            
+        Returns:
+            tuple: (index_path, vectors_path), or (None, None) if caching is disabled
+        """
+        if self.cache_dir is None:
+            return None, None
+        
+        key_source = json.dumps([self.model_name, list(scent_descriptions)])
+        key = hashlib.sha256(key_source.encode('utf-8')).hexdigest()
+        return (os.path.join(self.cache_dir, f"{key}.index"),
+                os.path.join(self.cache_dir, f"{key}.npy"))
+    
+    def _build_index(self, dimension, n_scents):
+        """
+        Create an untrained 8-bit quantized inner-product index.
+        
+        Small corpora use an exhaustive scalar-quantized (int8) index; large
+        ones use IVF-PQ with sqrt(N) lists and 8-bit product-quantizer codes.
+        
+        Args:
+            dimension (int): Embedding dimension
+            n_scents (int): Number of vectors that will be added
+            
+        Returns:
+            faiss.Index: Index to train and populate
+        """
+        if n_scents >= self.IVFPQ_MIN_SCENTS and dimension % 48 == 0:
+            nlist = int(np.sqrt(n_scents))
+            quantizer = faiss.IndexFlatIP(dimension)
+            index = faiss.IndexIVFPQ(quantizer, dimension, nlist, 48, 8, faiss.METRIC_INNER_PRODUCT)
+            index.nprobe = self.IVFPQ_NPROBE
+            return index
+        
+        return faiss.IndexScalarQuantizer(dimension, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT)
+    
     def search(self, query, k=1):
         """
         Search for the closest scents to the query.
@@ -47,20 +126,43 @@ class ScentSearch:
             k (int): Number of results to return
             
         Returns:
-            list: List of tuples (scent_description, distance)
+            list: List of tuples (scent_description, similarity)
+        """
+        return self.search_batch([query], k=k)[0]
+    
+    def search_batch(self, queries, k=1, batch_size=64):
+        """
+        Search for the closest scents to each of several queries at once.
+        
+        Args:
+            queries (list): List of query strings
+            k (int): Number of results to return per query
+            batch_size (int): Number of queries encoded per model forward pass
+            
+        Returns:
+            list: One list of tuples (scent_description, similarity) per query,
+                with fewer than k entries when the index has fewer matches
         """
-        # Encode the query
-        query_vector = self.model.encode([query])
+        # Encode all queries together, already normalized for cosine similarity
+        query_vectors = self.model.encode(
+            queries,
+            batch_size=batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True
+        )
         
         # Search the index
-        distances, indices = self.index.search(query_vector, k)
+        similarities, indices = self.index.search(query_vectors, k)
         
-        # Format results
+        # Format results; FAISS pads with index -1 when it finds fewer than k
+        # hits (k above the corpus size, or too few vectors in the probed lists)
         results = []
-        for i in range(len(indices[0])):
-            idx = indices[0][i]
-            distance = distances[0][i]
-            results.append((self.scent_descriptions[idx], distance))
+        for row_indices, row_similarities in zip(indices, similarities):
+            results.append([
+                (self.scent_descriptions[idx], similarity)
+                for idx, similarity in zip(row_indices, row_similarities)
+                if idx >= 0
+            ])
         
         return results
 
@@ -89,5 +191,5 @@ if __name__ == "__main__":
     # Display results
     print(f"\nSearch query: '{query}'")
     print("Results:")
-    for i, (scent, distance) in enumerate(results):
-        print(f"{i+1}. {scent} (distance: {distance:.4f})")
\ No newline at end of file
+    for i, (scent, similarity) in enumerate(results):
+        print(f"{i+1}. {scent} (similarity: {similarity:.4f})")
\ No newline at end of file